@@ -3,10 +3,12 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
+from modules.data_loader import get_crop_data, DATA_HASH_FUNCS, MAX_ENTRIES_CROP
 
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_CROP)
 def create_yield_boxplot(df, crop_name):
     """Vytvorenie boxplot grafu pre konkrétnu plodinu"""
-    crop_data = df[df['crop'] == crop_name].copy()
+    crop_data = get_crop_data(df, crop_name)
     
     if crop_data.empty:
         return None
@@ -45,9 +47,10 @@ def create_yield_boxplot(df, crop_name):
     
     return fig
 
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_CROP)
 def create_yield_trend(df, crop_name):
     """Vytvorenie trendového grafu výnosov v čase"""
-    crop_data = df[df['crop'] == crop_name].copy()
+    crop_data = get_crop_data(df, crop_name)
     
     if crop_data.empty:
         return None
@@ -98,9 +101,10 @@ def create_yield_trend(df, crop_name):
     
     return fig
 
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_CROP)
 def create_yield_distribution(df, crop_name):
     """Vytvorenie histogramu distribúcie výnosov pre konkrétnu plodinu"""
-    crop_data = df[df['crop'] == crop_name].copy()
+    crop_data = get_crop_data(df, crop_name)
     
     if crop_data.empty:
         return None
@@ -139,9 +143,10 @@ def create_yield_distribution(df, crop_name):
     
     return fig
 
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_CROP)
 def create_yield_percentiles(df, crop_name):
     """Vytvorenie histogramu s percentilmi výnosov pre konkrétnu plodinu"""
-    crop_data = df[df['crop'] == crop_name].copy()
+    crop_data = get_crop_data(df, crop_name)
     
     if crop_data.empty:
         return None
@@ -190,9 +195,11 @@ def create_yield_percentiles(df, crop_name):
     
     return fig
 
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_CROP)
 def create_yield_heatmap(df, crop_name):
     """Vytvorenie heatmapy výnosov pre konkrétnu plodinu"""
-    crop_data = df[df['crop'] == crop_name].copy()
+    # Kópia - pridáva sa stĺpec s výnosovou kategóriou
+    crop_data = get_crop_data(df, crop_name).copy()
     
     if crop_data.empty:
         return None
@@ -210,10 +217,10 @@ def create_yield_heatmap(df, crop_name):
     crop_data['yield_category'] = pd.cut(crop_data['yield_ha'], bins=yield_bins, labels=yield_labels, include_lowest=True)
     
     # Agregácia dát podľa roku a výnosovej kategórie
-    heatmap_data = crop_data.groupby(['year', 'yield_category']).size().unstack(fill_value=0)
+    heatmap_data = crop_data.groupby(['year', 'yield_category'], observed=True).size().unstack(fill_value=0)
     
-    # Preusporiadanie stĺpcov podľa výnosu (od najnižšieho po najvyšší)
-    heatmap_data = heatmap_data.reindex(columns=yield_labels)
+    # Preusporiadanie stĺpcov podľa výnosu (od najnižšieho po najvyšší), prázdne kategórie s počtom 0
+    heatmap_data = heatmap_data.reindex(columns=yield_labels, fill_value=0)
     
     # Vytvorenie heatmapy
     fig = go.Figure(data=go.Heatmap(
@@ -262,7 +269,7 @@ def show_crop_statistics(df, selected_crop):
     st.header(f"🌱 Štatistiky na úrovni plodiny: {selected_crop}")
     
     if selected_crop:
-        crop_data = df[df['crop'] == selected_crop]
+        crop_data = get_crop_data(df, selected_crop)
         
         # Základné štatistiky pre vybranú plodinu
         st.subheader("📊 Základné štatistiky")
@@ -1,58 +1,92 @@
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
-import re
 
-@st.cache_data
+DATA_FILE = 'yield_data.csv'
+
 def load_data():
-    """Načítanie dát z CSV súboru"""
+    """Načítanie dát z CSV súboru (vrátane výnosnosti v %), zdieľané medzi reláciami - len na čítanie"""
+    # Čas poslednej zmeny súboru ako kľúč cache - prepísaný CSV sa načíta znova bez reštartu servera
+    try:
+        mtime_ns = os.stat(DATA_FILE).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    return _load_data(mtime_ns)
+
+@st.cache_resource(show_spinner="Načítavam dáta z CSV súboru...", max_entries=1)
+def _load_data(mtime_ns):
+    """Načítanie a príprava dát pre danú verziu CSV súboru"""
     try:
-        # Načítanie CSV súboru
-        df = pd.read_csv('yield_data.csv', encoding='utf-8')
+        # Načítanie CSV súboru - názvy parciel a plodiny priamo ako kategórie (text, zoradené)
+        df = pd.read_csv(DATA_FILE, encoding='utf-8', dtype={'name': 'category', 'crop': 'category'})
         
-        # Konverzia dátových typov
-        df['year'] = pd.to_numeric(df['year'], errors='coerce')
+        # Konverzia dátových typov (výnos obsahuje aj textové poznámky, napr. '-' alebo názov plodiny)
+        df['year'] = pd.to_numeric(df['year'], errors='coerce', downcast='integer')  # int16 pre roky
         df['yield_ha'] = pd.to_numeric(df['yield_ha'], errors='coerce')
         df['area'] = pd.to_numeric(df['area'], errors='coerce')
         
         # Filtrovanie len platných výnosov
         df = df[df['yield_ha'] > 0]
         
+        # Výnosnosť v % sa počíta raz pri načítaní a cachuje sa spolu s dátami
+        df = calculate_yield_percentage(df)
+        
+        # Verzia súboru pre lacné kľúče cache (pozri data_key)
+        df.attrs['data_version'] = mtime_ns
         return df
     except Exception as e:
         st.error(f"Chyba pri načítaní dát: {e}")
         return None
 
-def parse_geometry(geometry_str):
-    """Parsovanie geometry string na súradnice"""
-    try:
-        if pd.isna(geometry_str) or geometry_str == '':
-            return None, None
-        
-        # Hľadanie súradníc v MULTIPOLYGON string
-        # Extrahujeme prvé súradnice pre zjednodušenie
-        coords_match = re.search(r'\(\(([^)]+)\)', str(geometry_str))
-        if coords_match:
-            coords_str = coords_match.group(1)
-            # Zoberieme prvú dvojicu súradníc
-            first_coord = coords_str.split(',')[0].strip()
-            lon, lat = map(float, first_coord.split())
-            return lat, lon
-        
-        return None, None
-    except:
-        return None, None
+def data_key(df):
+    """Lacný kľúč cache pre zdieľané načítané dáta - verzia súboru a identita objektu namiesto hashovania obsahu"""
+    return df.attrs.get('data_version'), id(df)
+
+# hash_funcs pre cachované funkcie, ktoré dostávajú DataFrame z load_data
+DATA_HASH_FUNCS = {pd.DataFrame: data_key}
+
+# Limity položiek cache odvodených dát - každá verzia CSV má nové kľúče, položky starších verzií sa tak vytlačia
+MAX_ENTRIES_PARCEL = 200        # na parcelu (v dátach 137 parciel)
+MAX_ENTRIES_PARCEL_CROP = 800   # na parcelu a plodinu (v dátach 546 kombinácií)
+MAX_ENTRIES_CROP = 30           # na plodinu (v dátach 15 plodín)
 
 def calculate_yield_percentage(df):
     """Výpočet výnosu v % oproti priemeru za rok a plodinu"""
-    # Výpočet priemerného výnosu za rok a plodinu
-    yearly_crop_avg = df.groupby(['year', 'crop'])['yield_ha'].mean().reset_index()
-    yearly_crop_avg = yearly_crop_avg.rename(columns={'yield_ha': 'avg_yield_crop_year'})
-    
-    # Spojenie s pôvodnými dátami
-    df_with_avg = df.merge(yearly_crop_avg, on=['year', 'crop'], how='left')
+    # Priemerný výnos za rok a plodinu priradený priamo ku každému riadku (bez merge)
+    avg_yield_crop_year = df.groupby(['year', 'crop'], observed=True)['yield_ha'].transform('mean')
     
     # Výpočet percentuálneho výnosu
-    df_with_avg['yield_percentage'] = (df_with_avg['yield_ha'] / df_with_avg['avg_yield_crop_year']) * 100
-    
-    return df_with_avg
+    return df.assign(
+        avg_yield_crop_year=avg_yield_crop_year,
+        yield_percentage=df['yield_ha'] / avg_yield_crop_year * 100
+    )
+
+def get_available_parcels(df):
+    """Zoradený zoznam parciel"""
+    # Kategórie sú zoradené už pri načítaní, vynechajú sa len nepoužité (odfiltrované) názvy
+    # (bez cache - čítanie kategórií trvá zhruba ako samotné vyhľadanie v cache)
+    return df['name'].cat.remove_unused_categories().cat.categories.tolist()
+
+def get_available_crops(df):
+    """Zoradený zoznam plodín"""
+    # Rovnako ako pri parcelách - čítanie už zoradených kategórií bez prechodu cez unique()
+    return df['crop'].cat.remove_unused_categories().cat.categories.tolist()
+
+@st.cache_resource(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=1)
+def _parcel_index(df):
+    """Index dát podľa názvu parcely - jeden groupby namiesto filtra pri každom volaní"""
+    return {name: group for name, group in df.groupby('name', sort=False, observed=True)}
+
+def get_parcel_data(df, parcel_name):
+    """Dáta vybranej parcely (len na čítanie, prázdny DataFrame ak parcela neexistuje)"""
+    return _parcel_index(df).get(parcel_name, df.iloc[0:0])
+
+@st.cache_resource(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=1)
+def _crop_index(df):
+    """Index dát podľa plodiny - jeden groupby namiesto filtra v každom grafe"""
+    return {crop: group for crop, group in df.groupby('crop', sort=False, observed=True)}
+
+def get_crop_data(df, crop_name):
+    """Dáta vybranej plodiny (len na čítanie, prázdny DataFrame ak plodina neexistuje)"""
+    return _crop_index(df).get(crop_name, df.iloc[0:0])
@@ -4,19 +4,45 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import io
-import geopandas as gpd
-from shapely import wkt
+from datetime import date
+from modules.data_loader import DATA_HASH_FUNCS
+from modules.map_utils import simplify_geometries, TOOLTIP_STYLE
 
 
 
+def get_yield_colors(yield_percentage, min_yield, max_yield):
+    """Kontinuálne farby podľa výnosnosti pre pole hodnôt - jemnejšie, menej kriklavé farby"""
+    values = np.asarray(yield_percentage, dtype=float)
+    
+    # Normalizácia na rozsah 0-1
+    normalized = (values - min_yield) / (max_yield - min_yield)
+    low = normalized <= 0.33
+    mid = ~low & (normalized <= 0.66)
+    
+    # Jemnejšia farebná škála od červenej (nízka) cez oranžovú a žltú po zelenú (vysoká):
+    # červená -> oranžová (0.0 - 0.33), oranžová -> žltá (0.33 - 0.66), žltá -> zelená (0.66 - 1.0)
+    t_low, t_mid, t_high = normalized * 3, (normalized - 0.33) * 3, (normalized - 0.66) * 3
+    r = np.where(low, 220, np.where(mid, 220 - 50 * t_mid, 170 - 120 * t_high))
+    g = np.where(low, 100 + 80 * t_low, np.where(mid, 180 + 75 * t_mid, 255 - 50 * t_high))
+    b = np.where(low, 50 + 100 * t_low, np.where(mid, 150 - 100 * t_mid, 50 + 100 * t_high))
+    
+    # Sivá pre chýbajúce hodnoty
+    missing = np.isnan(normalized)
+    rgb = np.trunc(np.column_stack([r, g, b])[~missing]).astype(int)
+    colors = np.full(len(values), '#808080', dtype=object)
+    colors[~missing] = [f'#{red:02x}{green:02x}{blue:02x}' for red, green, blue in rgb]
+    return colors
+
 def create_parcel_performance_map(df):
     """Vytvorenie datovej a faktografickej mapy s výkonnosťou parciel s mriežkou a bez satelitného pozadia"""
     try:
         import folium
         from folium import plugins
+        import geopandas as gpd
+        import shapely
         
         # Agregácia dát podľa parciel s detailnými metrikami
-        parcel_stats = df.groupby(['name', 'agev_parcel_id', 'area', 'geometry']).agg({
+        parcel_stats = df.groupby(['name', 'agev_parcel_id', 'area', 'geometry'], observed=True).agg({
             'yield_percentage': ['mean', 'std', 'min', 'max'],
             'yield_ha': ['mean', 'std', 'min', 'max'],
             'crop': ['count', 'nunique'],
@@ -37,24 +63,25 @@ def create_parcel_performance_map(df):
         if parcel_stats.empty:
             return None
         
-        # Konverzia na GeoDataFrame
-        parcel_stats['geometry'] = parcel_stats['geometry'].apply(wkt.loads)
-        gdf = gpd.GeoDataFrame(parcel_stats, geometry='geometry')
-        
-        # Nastavenie CRS na WGS84
-        gdf.set_crs(epsg=4326, inplace=True)
+        # Konverzia na GeoDataFrame v jednom kroku (CRS WGS84), hromadné parsovanie WKT
+        gdf = gpd.GeoDataFrame(parcel_stats, geometry=shapely.from_wkt(parcel_stats['geometry'].to_numpy()), crs='EPSG:4326')
         
         # Výpočet bounds pre správny zoom
         bounds = gdf.total_bounds  # [minx, miny, maxx, maxy]
         center_lon = (bounds[0] + bounds[2]) / 2
         center_lat = (bounds[1] + bounds[3]) / 2
         
+        # Zjednodušenie polygónov podľa rozsahu mapy (menší GeoJSON pre prehliadač),
+        # jemnejšia tolerancia - parcely celého podniku sa na mape približujú
+        gdf['geometry'] = simplify_geometries(gdf.geometry.values, max(bounds[2] - bounds[0], bounds[3] - bounds[1]), divisor=4000)
+        
         # Vytvorenie mapy pomocou folium s datovým vzhľadom
         m = folium.Map(
             location=[center_lat, center_lon],
             zoom_start=10,
             tiles='CartoDB positron',  # Čistý, datový štýl bez satelitného pozadia
-            control_scale=True
+            control_scale=True,
+            prefer_canvas=True  # Polygóny parciel a mriežka kreslené na jeden canvas namiesto SVG uzlov
         )
         
         # Dynamické nastavenie zoom levelu na základe veľkosti oblasti
@@ -80,63 +107,39 @@ def create_parcel_performance_map(df):
         # Pridanie mriežky pre datový vzhľad
         grid_spacing = max_range / 20  # 20 riadkov/stĺpcov mriežky
         
-        # Pridanie vertikálnych čiar mriežky
-        for i in range(21):
-            lon_pos = bounds[0] + i * grid_spacing
-            folium.PolyLine(
-                locations=[[bounds[1], lon_pos], [bounds[3], lon_pos]],
-                color='rgba(128, 128, 128, 0.3)',
-                weight=0.5,
-                opacity=0.3
-            ).add_to(m)
-        
-        # Pridanie horizontálnych čiar mriežky
-        for i in range(21):
-            lat_pos = bounds[1] + i * grid_spacing
-            folium.PolyLine(
-                locations=[[lat_pos, bounds[0]], [lat_pos, bounds[2]]],
-                color='rgba(128, 128, 128, 0.3)',
-                weight=0.5,
-                opacity=0.3
-            ).add_to(m)
+        # Vertikálne a horizontálne čiary mriežky ako jedna viacsegmentová línia
+        lon_pos = bounds[0] + np.arange(21) * grid_spacing
+        lat_pos = bounds[1] + np.arange(21) * grid_spacing
+        vertical_lines = np.stack([
+            np.column_stack([np.full(21, bounds[1]), lon_pos]),
+            np.column_stack([np.full(21, bounds[3]), lon_pos])
+        ], axis=1)
+        horizontal_lines = np.stack([
+            np.column_stack([lat_pos, np.full(21, bounds[0])]),
+            np.column_stack([lat_pos, np.full(21, bounds[2])])
+        ], axis=1)
+        grid_lines = np.concatenate([vertical_lines, horizontal_lines]).tolist()
+        
+        folium.PolyLine(
+            locations=grid_lines,
+            color='rgba(128, 128, 128, 0.3)',
+            weight=0.5,
+            opacity=0.3
+        ).add_to(m)
         
         # Pridanie parciel s kontinuálnym farebným kódovaním
         # Výpočet min a max hodnôt pre farebné škálovanie
         min_yield = gdf['avg_yield_percentage'].min()
         max_yield = gdf['avg_yield_percentage'].max()
         
-        # Funkcia pre výpočet farby na základe výnosnosti - jemnejšie, menej kriklavé farby
-        def get_color(yield_percentage):
-            if pd.isna(yield_percentage):
-                return '#808080'  # Sivá pre chýbajúce hodnoty
-            
-            # Normalizácia na rozsah 0-1
-            normalized = (yield_percentage - min_yield) / (max_yield - min_yield)
-            
-            # Jemnejšia farebná škála od červenej (nízka) cez oranžovú a žltú po zelenú (vysoká)
-            if normalized <= 0.33:
-                # Od červenej po oranžovú (0.0 - 0.33) - jemnejšie červené
-                r = 220
-                g = int(100 + 80 * (normalized * 3))
-                b = int(50 + 100 * (normalized * 3))
-            elif normalized <= 0.66:
-                # Od oranžovej po žltú (0.33 - 0.66) - jemnejšie oranžové a žlté
-                r = int(220 - 50 * ((normalized - 0.33) * 3))
-                g = int(180 + 75 * ((normalized - 0.33) * 3))
-                b = int(150 - 100 * ((normalized - 0.33) * 3))
-            else:
-                # Od žltej po zelenú (0.66 - 1.0) - jemnejšie žlté a zelené
-                r = int(170 - 120 * ((normalized - 0.66) * 3))
-                g = int(255 - 50 * ((normalized - 0.66) * 3))
-                b = int(50 + 100 * ((normalized - 0.66) * 3))
-            
-            return f'#{r:02x}{g:02x}{b:02x}'
+        # Farba každej parcely naraz (vektorovo), štýl ju číta z vlastností parcely
+        gdf['color'] = get_yield_colors(gdf['avg_yield_percentage'], min_yield, max_yield)
         
         # Pridanie všetkých parciel s kontinuálnymi farbami
         folium.GeoJson(
             gdf,
             style_function=lambda x: {
-                'fillColor': get_color(x['properties']['avg_yield_percentage']),
+                'fillColor': x['properties']['color'],
                 'color': '#000000',
                 'weight': 1,
                 'fillOpacity': 0.8
@@ -147,16 +150,7 @@ def create_parcel_performance_map(df):
                 localize=True,
                 sticky=False,
                 labels=True,
-                style="""
-                    background-color: rgba(0, 0, 0, 0.8);
-                    border: 2px solid white;
-                    border-radius: 5px;
-                    box-shadow: 3px;
-                    color: white;
-                    font-weight: bold;
-                    font-size: 12px;
-                    padding: 5px;
-                """
+                style=TOOLTIP_STYLE
             )
         ).add_to(m)
         
@@ -175,31 +169,70 @@ def create_parcel_performance_map(df):
         st.error(f"Chyba pri vytváraní datovej mapy: {e}")
         return None
 
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=1)
+def get_parcel_performance_map_html(df):
+    """HTML mapy výkonnosti parciel (cachované, rerun nevytvára mapu znova)"""
+    map_fig = create_parcel_performance_map(df)
+    return map_fig._repr_html_() if map_fig else None
+
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=1)
+def get_parcel_performance(df):
+    """Priemerná výnosnosť parciel zoradená zostupne (jeden groupby pre top, najhoršie aj kategórie)"""
+    return df.groupby('name', observed=True)['yield_percentage'].mean().sort_values(ascending=False)
+
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=1)
+def get_export_csv(df):
+    """CSV export všetkých dát ako bajty (cachované, opakované kliknutie neserializuje znova)"""
+    return df.to_csv(index=False).encode('utf-8-sig')
+
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=1)
+def get_export_excel(df):
+    """Excel export všetkých dát ako bajty (cachované, opakované kliknutie nezapisuje znova)"""
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Výnosy', index=False)
+    return output.getvalue()
+
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=1)
+def get_parcel_yearly_tooltips(df):
+    """Texty tooltipov s výnosnosťou parciel po rokoch (jeden groupby pre všetky parcely)"""
+    yearly_percentages = df.groupby(['name', 'year'], observed=True)['yield_percentage'].mean().round(1)
+    yearly_info = yearly_percentages.index.get_level_values('year').astype(str) + ': ' + yearly_percentages.astype(str) + '%'
+    return yearly_info.groupby(level='name', observed=True).agg('<br>'.join)
+
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=1)
+def get_parcel_details(df):
+    """Detailné štatistiky všetkých parciel pre tabuľky kategórií (jeden groupby namiesto piatich)"""
+    parcel_details = df.groupby('name', observed=True).agg({
+        'yield_percentage': ['mean', 'std', 'min', 'max'],
+        'area': 'first',
+        'crop': 'nunique',
+        'year': 'nunique'
+    }).round(2)
+    parcel_details.columns = ['Priemerná výnosnosť (%)', 'Smerodajná odchýlka', 'Minimum', 'Maximum', 'Plocha (ha)', 'Počet plodín', 'Počet rokov']
+    return parcel_details
+
 def show_enterprise_statistics(df, selected_crop):
     """Zobrazenie štatistik na úrovni podniku"""
     # Analýza výkonnosti parciel
     st.header("🏆 Výkonnosť parciel")
     
+    # Priemerná výnosnosť všetkých parciel a tooltipy po rokoch - počítajú sa raz
+    parcel_performance = get_parcel_performance(df)
+    yearly_tooltips = get_parcel_yearly_tooltips(df)
+    
     # Top parcely podľa výnosnosti
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("📊 Top 10 parciel podľa výnosnosti")
-        top_parcels = df.groupby('name')['yield_percentage'].mean().sort_values(ascending=False).head(10)
+        top_parcels = parcel_performance.nlargest(10)
         
         # Vytvorenie atraktívneho grafu s gradientom farieb a detailnými tooltipmi
         # Zoradenie parciel od najvyššieho percenta (hore) po najnižšie (dole)
         
         # Príprava detailných tooltipov pre každú parcelu
-        tooltip_data = []
-        for parcel_name in top_parcels.index:
-            parcel_data = df[df['name'] == parcel_name]
-            yearly_percentages = parcel_data.groupby('year')['yield_percentage'].mean().round(1)
-            yearly_info = []
-            for year, percentage in yearly_percentages.items():
-                yearly_info.append(f"{year}: {percentage}%")
-            yearly_text = "<br>".join(yearly_info)
-            tooltip_data.append(yearly_text)
+        tooltip_data = yearly_tooltips.loc[top_parcels.index].tolist()
         
         fig = go.Figure()
         fig.add_trace(go.Bar(
@@ -239,22 +272,14 @@ def show_enterprise_statistics(df, selected_crop):
     
     with col2:
         st.subheader("📉 Najhoršie parcely")
-        worst_parcels = df.groupby('name')['yield_percentage'].mean().sort_values().head(10)
+        worst_parcels = parcel_performance.nsmallest(10)
         
         # Vytvorenie atraktívneho grafu s gradientom farieb a detailnými tooltipmi
         # Zoradenie parciel od najvyššieho percenta (hore) po najnižšie (dole)
         # Najnižšie percento bude na spodku grafu s najsýtejšou červenou
         
         # Príprava detailných tooltipov pre každú parcelu
-        tooltip_data_worst = []
-        for parcel_name in worst_parcels.index:
-            parcel_data = df[df['name'] == parcel_name]
-            yearly_percentages = parcel_data.groupby('year')['yield_percentage'].mean().round(1)
-            yearly_info = []
-            for year, percentage in yearly_percentages.items():
-                yearly_info.append(f"{year}: {percentage}%")
-            yearly_text = "<br>".join(yearly_info)
-            tooltip_data_worst.append(yearly_text)
+        tooltip_data_worst = yearly_tooltips.loc[worst_parcels.index].tolist()
         
         fig = go.Figure()
         fig.add_trace(go.Bar(
@@ -297,8 +322,9 @@ def show_enterprise_statistics(df, selected_crop):
     # Kategorizácia parciel do piatich kategórií
     st.header("🏷️ Kategorizácia parciel podľa výkonnosti")
     
-    # Výpočet kategórií pre všetky parcely
-    parcel_performance = df.groupby('name')['yield_percentage'].mean().sort_values(ascending=False)
+    # Kategórie sa počítajú z už zoradenej výnosnosti všetkých parciel,
+    # detaily pre tabuľky kategórií z jedného groupby cez všetky parcely
+    parcel_details = get_parcel_details(df)
     
     # Definovanie kategórií
     total_parcels = len(parcel_performance)
@@ -375,14 +401,7 @@ def show_enterprise_statistics(df, selected_crop):
         st.markdown(f"**Priemerná výnosnosť:** {category_1.mean():.1f}%")
         
         # Tabuľka s detailmi
-        category_1_details = df[df['name'].isin(category_1.index)].groupby('name').agg({
-            'yield_percentage': ['mean', 'std', 'min', 'max'],
-            'area': 'first',
-            'crop': 'nunique',
-            'year': 'nunique'
-        }).round(2)
-        category_1_details.columns = ['Priemerná výnosnosť (%)', 'Smerodajná odchýlka', 'Minimum', 'Maximum', 'Plocha (ha)', 'Počet plodín', 'Počet rokov']
-        category_1_details = category_1_details.sort_values('Priemerná výnosnosť (%)', ascending=False)
+        category_1_details = parcel_details[parcel_details.index.isin(category_1.index)].sort_values('Priemerná výnosnosť (%)', ascending=False)
         st.dataframe(category_1_details, use_container_width=True)
     
     with st.expander("🥈 Kategória B - Nadpriemerné parcely", expanded=False):
@@ -390,14 +409,7 @@ def show_enterprise_statistics(df, selected_crop):
         st.markdown(f"**Počet parciel:** {len(category_2)} ({len(category_2)/total_parcels*100:.1f}%)")
         st.markdown(f"**Priemerná výnosnosť:** {category_2.mean():.1f}%")
         
-        category_2_details = df[df['name'].isin(category_2.index)].groupby('name').agg({
-            'yield_percentage': ['mean', 'std', 'min', 'max'],
-            'area': 'first',
-            'crop': 'nunique',
-            'year': 'nunique'
-        }).round(2)
-        category_2_details.columns = ['Priemerná výnosnosť (%)', 'Smerodajná odchýlka', 'Minimum', 'Maximum', 'Plocha (ha)', 'Počet plodín', 'Počet rokov']
-        category_2_details = category_2_details.sort_values('Priemerná výnosnosť (%)', ascending=False)
+        category_2_details = parcel_details[parcel_details.index.isin(category_2.index)].sort_values('Priemerná výnosnosť (%)', ascending=False)
         st.dataframe(category_2_details, use_container_width=True)
     
     with st.expander("🥉 Kategória C - Priemerné parcely", expanded=False):
@@ -405,14 +417,7 @@ def show_enterprise_statistics(df, selected_crop):
         st.markdown(f"**Počet parciel:** {len(category_3)} ({len(category_3)/total_parcels*100:.1f}%)")
         st.markdown(f"**Priemerná výnosnosť:** {category_3.mean():.1f}%")
         
-        category_3_details = df[df['name'].isin(category_3.index)].groupby('name').agg({
-            'yield_percentage': ['mean', 'std', 'min', 'max'],
-            'area': 'first',
-            'crop': 'nunique',
-            'year': 'nunique'
-        }).round(2)
-        category_3_details.columns = ['Priemerná výnosnosť (%)', 'Smerodajná odchýlka', 'Minimum', 'Maximum', 'Plocha (ha)', 'Počet plodín', 'Počet rokov']
-        category_3_details = category_3_details.sort_values('Priemerná výnosnosť (%)', ascending=False)
+        category_3_details = parcel_details[parcel_details.index.isin(category_3.index)].sort_values('Priemerná výnosnosť (%)', ascending=False)
         st.dataframe(category_3_details, use_container_width=True)
     
     with st.expander("⚠️ Kategória D - Podpriemerné parcely", expanded=False):
@@ -420,14 +425,7 @@ def show_enterprise_statistics(df, selected_crop):
         st.markdown(f"**Počet parciel:** {len(category_4)} ({len(category_4)/total_parcels*100:.1f}%)")
         st.markdown(f"**Priemerná výnosnosť:** {category_4.mean():.1f}%")
         
-        category_4_details = df[df['name'].isin(category_4.index)].groupby('name').agg({
-            'yield_percentage': ['mean', 'std', 'min', 'max'],
-            'area': 'first',
-            'crop': 'nunique',
-            'year': 'nunique'
-        }).round(2)
-        category_4_details.columns = ['Priemerná výnosnosť (%)', 'Smerodajná odchýlka', 'Minimum', 'Maximum', 'Plocha (ha)', 'Počet plodín', 'Počet rokov']
-        category_4_details = category_4_details.sort_values('Priemerná výnosnosť (%)', ascending=False)
+        category_4_details = parcel_details[parcel_details.index.isin(category_4.index)].sort_values('Priemerná výnosnosť (%)', ascending=False)
         st.dataframe(category_4_details, use_container_width=True)
     
     with st.expander("🚨 Kategória E - Slabé parcely", expanded=False):
@@ -435,14 +433,7 @@ def show_enterprise_statistics(df, selected_crop):
         st.markdown(f"**Počet parciel:** {len(category_5)} ({len(category_5)/total_parcels*100:.1f}%)")
         st.markdown(f"**Priemerná výnosnosť:** {category_5.mean():.1f}%")
         
-        category_5_details = df[df['name'].isin(category_5.index)].groupby('name').agg({
-            'yield_percentage': ['mean', 'std', 'min', 'max'],
-            'area': 'first',
-            'crop': 'nunique',
-            'year': 'nunique'
-        }).round(2)
-        category_5_details.columns = ['Priemerná výnosnosť (%)', 'Smerodajná odchýlka', 'Minimum', 'Maximum', 'Plocha (ha)', 'Počet plodín', 'Počet rokov']
-        category_5_details = category_5_details.sort_values('Priemerná výnosnosť (%)', ascending=False)
+        category_5_details = parcel_details[parcel_details.index.isin(category_5.index)].sort_values('Priemerná výnosnosť (%)', ascending=False)
         st.dataframe(category_5_details, use_container_width=True)
     
     # Vysvetlenie kategorizácie
@@ -471,11 +462,10 @@ def show_enterprise_statistics(df, selected_crop):
             st.info("Funkcia exportu mapy bude implementovaná v ďalšej verzii.")
     
     with st.spinner("Generujem datovú mapu parciel s mriežkou..."):
-        map_fig = create_parcel_performance_map(df)
-        if map_fig:
+        map_html = get_parcel_performance_map_html(df)
+        if map_html:
             # Pre folium mapu používame st.components.html
-            folium_static = map_fig._repr_html_()
-            st.components.v1.html(folium_static, height=700)
+            st.components.v1.html(map_html, height=700)
             
 
         else:
@@ -488,25 +478,18 @@ def show_enterprise_statistics(df, selected_crop):
     
     with col1:
         if st.button("Export CSV"):
-            csv = df.to_csv(index=False, encoding='utf-8-sig')
             st.download_button(
                 label="Stiahnuť CSV",
-                data=csv,
-                file_name=f"vynosy_analyza_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+                data=get_export_csv(df),
+                file_name=f"vynosy_analyza_{date.today():%Y%m%d}.csv",
                 mime="text/csv"
             )
     
     with col2:
         if st.button("Export Excel"):
-            # Vytvorenie Excel súboru
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Výnosy', index=False)
-            output.seek(0)
-            
             st.download_button(
                 label="Stiahnuť Excel",
-                data=output.getvalue(),
-                file_name=f"vynosy_analyza_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx",
+                data=get_export_excel(df),
+                file_name=f"vynosy_analyza_{date.today():%Y%m%d}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
@@ -0,0 +1,53 @@
+import numpy as np
+
+# Hranice výnosnosti (%) a farby tried D, C, B, B+, A, A+
+PERFORMANCE_BINS = np.array([70, 85, 100, 115, 130])
+PERFORMANCE_COLORS = np.array([
+    '#DC143C',  # Karmínová - slabá
+    '#FF8C00',  # Tmavooranžová - podpriemerná
+    '#FFD700',  # Zlatá - priemerná
+    '#32CD32',  # Limetkovozelená - dobrá
+    '#228B22',  # Forest green - veľmi dobrá
+    '#006400'   # Tmavozelená - výborná
+])
+
+PERFORMANCE_LABELS = np.array(['Slabá', 'Podpriemerná', 'Priemerná', 'Dobrá', 'Veľmi dobrá', 'Výborná'])
+PERFORMANCE_GRADES = np.array(['D', 'C', 'B', 'B+', 'A', 'A+'])
+
+# Štýl tooltipu parciel na mapách (jeden reťazec pre všetky mapy)
+TOOLTIP_STYLE = (
+    "background-color: rgba(0, 0, 0, 0.8); border: 2px solid white; border-radius: 5px; "
+    "box-shadow: 3px; color: white; font-weight: bold; font-size: 12px; padding: 5px;"
+)
+
+# Riadky legendy výnosnosti pre mapy (statické, od najlepšej triedy)
+PERFORMANCE_LEGEND_ROWS = ''.join(reversed([
+    f"<p>{icon} {threshold} - {label} ({grade})</p>"
+    for icon, threshold, label, grade in zip(
+        ['🔴', '🟠', '🟡', '🟢', '🟢', '🟢'],
+        [f"<{PERFORMANCE_BINS[0]}%"] + [f"≥{limit}%" for limit in PERFORMANCE_BINS],
+        PERFORMANCE_LABELS,
+        PERFORMANCE_GRADES
+    )
+]))
+
+def get_performance_class(yield_percentage):
+    """Index triedy výkonnosti cez np.searchsorted (chýbajúce hodnoty ako slabá trieda)"""
+    values = np.nan_to_num(np.asarray(yield_percentage, dtype=float), nan=-np.inf)
+    return np.searchsorted(PERFORMANCE_BINS, values, side='right')
+
+def get_performance_colors(yield_percentage):
+    """Farby podľa výnosnosti pre pole hodnôt"""
+    return PERFORMANCE_COLORS[get_performance_class(yield_percentage)]
+
+def get_performance_grade(yield_percentage):
+    """Farba, slovné hodnotenie a známka pre jednu hodnotu výnosnosti"""
+    i = int(get_performance_class(yield_percentage))
+    return str(PERFORMANCE_COLORS[i]), str(PERFORMANCE_LABELS[i]), str(PERFORMANCE_GRADES[i])
+
+def simplify_geometries(geometries, max_range, divisor=500):
+    """Zjednodušenie geometrií pred odoslaním do prehliadača (tolerancia max_range / divisor, presnosť 5 desatinných miest)"""
+    import shapely
+    
+    simplified = shapely.simplify(geometries, max_range / divisor, preserve_topology=True)
+    return shapely.set_precision(simplified, 1e-5)
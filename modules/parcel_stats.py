@@ -3,25 +3,218 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import geopandas as gpd
-from shapely import wkt
-import folium
-from folium import plugins
+from datetime import date
+from modules.data_loader import get_parcel_data, DATA_HASH_FUNCS, MAX_ENTRIES_PARCEL, MAX_ENTRIES_PARCEL_CROP
+from modules.map_utils import (
+    PERFORMANCE_LEGEND_ROWS, TOOLTIP_STYLE,
+    get_performance_colors, get_performance_grade, simplify_geometries
+)
+
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=1)
+def _all_parcel_summaries(df):
+    """Agregácia všetkých parciel podľa roku a plodiny - jeden groupby pre celý dataset"""
+    return df.groupby(['name', 'year', 'crop'], observed=True).agg({
+        'yield_ha': 'mean',
+        'yield_percentage': 'mean',
+        'area': 'mean'
+    }).sort_index(ascending=[True, False, True])  # poradie tabuľky: rok zostupne, plodina vzostupne
+
+def get_parcel_summary(df, parcel_name):
+    """Agregované dáta parcely podľa roku a plodiny, zoradené pre tabuľku"""
+    return _all_parcel_summaries(df).xs(parcel_name, level='name').reset_index()
+
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_PARCEL)
+def get_parcel_metrics(df, parcel_name):
+    """Súhrnné metriky parcely nad NumPy poliami - zdieľané stránkou, radarom aj mapami (cachované)"""
+    parcel_data = get_parcel_data(df, parcel_name)
+    yields = parcel_data['yield_ha'].to_numpy(dtype=float)
+    years = parcel_data['year'].to_numpy()
+    crops = parcel_data['crop'].to_numpy()
+    crop_codes = parcel_data['crop'].cat.codes.to_numpy()
+    areas = parcel_data['area'].to_numpy(dtype=float)
+    count = len(yields)
+    
+    # Priemer a smerodajná odchýlka (ddof=1) zo súčtu a súčtu štvorcov
+    yield_sum = yields.sum()
+    yield_mean = yield_sum / count
+    yield_var = (yields @ yields - yield_sum * yield_mean) / (count - 1) if count > 1 else np.nan
+    yield_std = np.sqrt(max(yield_var, 0.0))
+    
+    best_pos, worst_pos = yields.argmax(), yields.argmin()
+    metrics = {
+        'count': count,
+        'crop_count': np.unique(crop_codes[crop_codes >= 0]).size,
+        'year_min': years.min(),
+        'year_max': years.max(),
+        'area_sum': np.nansum(areas),
+        'area_mean': np.nanmean(areas),
+        'yield_mean': yield_mean,
+        'yield_cv': yield_std / yield_mean * 100,
+        'best_year': years[best_pos],
+        'best_crop': crops[best_pos],
+        'best_yield': yields[best_pos],
+        'worst_year': years[worst_pos],
+        'worst_crop': crops[worst_pos],
+        'worst_yield': yields[worst_pos],
+        'avg_performance': np.nanmean(parcel_data['yield_percentage'].to_numpy(dtype=float))
+    }
+    
+    # Formátované texty pre metriky stránky
+    metrics['labels'] = {
+        'count': f"{count:,}",
+        'crop_count': f"{metrics['crop_count']}",
+        'period': f"{metrics['year_min']} - {metrics['year_max']}",
+        'area_mean': f"{metrics['area_mean']:.2f} ha",
+        'yield_cv': f"{metrics['yield_cv']:.1f}%",
+        'best_year': f"{metrics['best_year']} ({metrics['best_crop']})",
+        'worst_year': f"{metrics['worst_year']} ({metrics['worst_crop']})",
+        'avg_performance': f"{metrics['avg_performance']:.1f}%"
+    }
+    return metrics
+
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_PARCEL)
+def get_parcel_csv(df, parcel_name):
+    """CSV export parcely ako bajty (cachované, opakované kliknutie neserializuje znova)"""
+    return get_parcel_data(df, parcel_name).to_csv(index=False).encode('utf-8-sig')
+
+@st.cache_data(show_spinner=False)
+def _parcel_geojson(parcel_name, geometry_wkt):
+    """GeoJSON (zjednodušený) a bounds jednej parcely, cachované podľa názvu a WKT"""
+    import shapely
+    import shapely.geometry
+    from shapely import wkt
+    
+    parcel_geometry = wkt.loads(geometry_wkt)
+    bounds = shapely.bounds(parcel_geometry)
+    parcel_geometry = simplify_geometries(parcel_geometry, max(bounds[2] - bounds[0], bounds[3] - bounds[1]))
+    parcel_geojson = {
+        'type': 'FeatureCollection',
+        'features': [{
+            'type': 'Feature',
+            'properties': {'name': parcel_name},
+            'geometry': shapely.geometry.mapping(parcel_geometry)
+        }]
+    }
+    return parcel_geojson, bounds
+
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_PARCEL)
+def get_crop_trend_lines(df, parcel_name):
+    """Lineárny trend výnosu v čase pre všetky plodiny parcely naraz (najmenšie štvorce v uzavretom tvare)"""
+    parcel_data = get_parcel_data(df, parcel_name)
+    crops = parcel_data['crop']
+    years = parcel_data['year'].astype(float)
+    yields = parcel_data['yield_ha']
+    
+    # Odchýlky od priemerov plodiny, sklon = cov(x, y) / var(x)
+    dx = years - years.groupby(crops, observed=True).transform('mean')
+    dy = yields - yields.groupby(crops, observed=True).transform('mean')
+    sums = pd.DataFrame({'xy': dx * dy, 'xx': dx * dx, 'x': years, 'y': yields}).groupby(crops, observed=True).agg(
+        xy=('xy', 'sum'), xx=('xx', 'sum'), x=('x', 'mean'), y=('y', 'mean')
+    )
+    slope = sums['xy'] / sums['xx']
+    return pd.DataFrame({'slope': slope, 'intercept': sums['y'] - slope * sums['x']})
+
+@st.cache_resource(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_PARCEL)
+def _parcel_data_by_crop_year(df, parcel_name):
+    """Dáta parcely zoradené raz podľa plodiny a roku (skupiny plodín sú súvislé a zoradené)"""
+    return get_parcel_data(df, parcel_name).sort_values(['crop', 'year'], kind='stable')
+
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_PARCEL)
+def get_crop_timeline_stats(df, parcel_name):
+    """Štatistiky výnosov všetkých plodín parcely jednou agregáciou (poradie podľa roku)"""
+    parcel_data = _parcel_data_by_crop_year(df, parcel_name)
+    crop_stats = parcel_data.groupby('crop', observed=True).agg(
+        count=('yield_ha', 'size'),
+        mean=('yield_ha', 'mean'),
+        first=('yield_ha', 'first'),
+        last=('yield_ha', 'last'),
+        min=('yield_ha', 'min'),
+        max=('yield_ha', 'max'),
+        min_idx=('yield_ha', 'idxmin'),
+        max_idx=('yield_ha', 'idxmax'),
+        year_min=('year', 'min'),
+        year_max=('year', 'max')
+    )
+    
+    # Roky s najvyšším/najnižším výnosom podľa indexov z agregácie
+    crop_stats['best_year'] = parcel_data.loc[crop_stats['max_idx'], 'year'].to_numpy()
+    crop_stats['worst_year'] = parcel_data.loc[crop_stats['min_idx'], 'year'].to_numpy()
+    return crop_stats.drop(columns=['min_idx', 'max_idx'])
+
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_PARCEL_CROP)
+def create_crop_timeline_figure(df, parcel_name, crop):
+    """Malý graf časovej postupnosti úrod jednej plodiny na parcele (cachovaný)"""
+    parcel_data = _parcel_data_by_crop_year(df, parcel_name)
+    crop_data_sorted = parcel_data.groupby('crop', observed=True, sort=False).get_group(crop)
+    
+    # Vytvorenie malého grafu pre plodinu
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatter(
+        x=crop_data_sorted['year'],
+        y=crop_data_sorted['yield_ha'],
+        mode='lines+markers',
+        name=crop,
+        line=dict(width=2, color='#1f77b4'),
+        marker=dict(size=6, color='#1f77b4'),
+        hovertemplate=f'<b>{crop}</b><br>' +
+                    'Rok: %{x}<br>' +
+                    'Výnos: %{y:.2f} t/ha<extra></extra>'
+    ))
+    
+    # Pridanie trendovej línie ak sú aspoň 3 body
+    if len(crop_data_sorted) >= 3:
+        slope, intercept = get_crop_trend_lines(df, parcel_name).loc[crop]
+        fig.add_trace(go.Scatter(
+            x=crop_data_sorted['year'],
+            y=intercept + slope * crop_data_sorted['year'].to_numpy(dtype=float),
+            mode='lines',
+            name='Trend',
+            line=dict(width=1, color='red', dash='dash'),
+            showlegend=False,
+            hovertemplate='Trend<extra></extra>'
+        ))
+    
+    # Aktualizácia layoutu grafu
+    fig.update_layout(
+        title=f"🌾 {crop}",
+        xaxis_title="Rok",
+        yaxis_title="Výnos (t/ha)",
+        height=250,
+        margin=dict(l=40, r=40, t=60, b=40),
+        showlegend=False,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='rgba(128,128,128,0.2)',
+            zeroline=False
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='rgba(128,128,128,0.2)',
+            zeroline=False
+        )
+    )
+    
+    return fig
 
 def create_crop_timeline_charts(df, parcel_name):
     """Vytvorenie malých grafov pre časovú postupnosť úrod pre jednotlivé plodiny"""
-    parcel_data = df[df['name'].astype(str) == parcel_name].copy()
+    parcel_data = get_parcel_data(df, parcel_name)
     
     if parcel_data.empty:
         return None
     
-    # Zoskupenie dát podľa plodiny a kontrola počtu záznamov
-    crop_groups = parcel_data.groupby('crop')
-    valid_crops = []
-    
-    for crop, crop_data in crop_groups:
-        if len(crop_data) > 2:  # Iba plodiny s viac ako 2 záznamami
-            valid_crops.append((crop, crop_data))
+    # Štatistiky všetkých plodín naraz a kontrola počtu záznamov
+    crop_stats = get_crop_timeline_stats(df, parcel_name).to_dict('index')
+    crop_groups = _parcel_data_by_crop_year(df, parcel_name).groupby('crop', observed=True, sort=False)
+    valid_crops = [
+        (crop, crop_groups.get_group(crop))
+        for crop, stats in crop_stats.items() if stats['count'] > 2  # Iba plodiny s viac ako 2 záznamami
+    ]
     
     if not valid_crops:
         return None
@@ -36,67 +229,14 @@ def create_crop_timeline_charts(df, parcel_name):
         row_crops = valid_crops[i * cols_per_row:(i + 1) * cols_per_row]
         cols = st.columns(len(row_crops))
         
-        for j, (crop, crop_data) in enumerate(row_crops):
+        for j, (crop, crop_data_sorted) in enumerate(row_crops):
             with cols[j]:
-                # Zoradenie dát podľa roku
-                crop_data_sorted = crop_data.sort_values('year')
-                
-                # Vytvorenie malého grafu pre plodinu
-                fig = go.Figure()
+                # Malý graf plodiny (cachovaný)
+                fig = create_crop_timeline_figure(df, parcel_name, crop)
                 
-                fig.add_trace(go.Scatter(
-                    x=crop_data_sorted['year'],
-                    y=crop_data_sorted['yield_ha'],
-                    mode='lines+markers',
-                    name=crop,
-                    line=dict(width=2, color='#1f77b4'),
-                    marker=dict(size=6, color='#1f77b4'),
-                    hovertemplate=f'<b>{crop}</b><br>' +
-                                'Rok: %{x}<br>' +
-                                'Výnos: %{y:.2f} t/ha<extra></extra>'
-                ))
-                
-                # Pridanie trendovej línie ak sú aspoň 3 body
-                if len(crop_data_sorted) >= 3:
-                    z = np.polyfit(crop_data_sorted['year'], crop_data_sorted['yield_ha'], 1)
-                    p = np.poly1d(z)
-                    fig.add_trace(go.Scatter(
-                        x=crop_data_sorted['year'],
-                        y=p(crop_data_sorted['year']),
-                        mode='lines',
-                        name='Trend',
-                        line=dict(width=1, color='red', dash='dash'),
-                        showlegend=False,
-                        hovertemplate='Trend<extra></extra>'
-                    ))
-                
-                # Výpočet metrík pre plodinu
-                avg_yield = crop_data_sorted['yield_ha'].mean()
-                yield_trend = "↗️" if len(crop_data_sorted) >= 2 and crop_data_sorted['yield_ha'].iloc[-1] > crop_data_sorted['yield_ha'].iloc[0] else "↘️"
-                
-                # Aktualizácia layoutu grafu
-                fig.update_layout(
-                    title=f"🌾 {crop}",
-                    xaxis_title="Rok",
-                    yaxis_title="Výnos (t/ha)",
-                    height=250,
-                    margin=dict(l=40, r=40, t=60, b=40),
-                    showlegend=False,
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    xaxis=dict(
-                        showgrid=True,
-                        gridwidth=1,
-                        gridcolor='rgba(128,128,128,0.2)',
-                        zeroline=False
-                    ),
-                    yaxis=dict(
-                        showgrid=True,
-                        gridwidth=1,
-                        gridcolor='rgba(128,128,128,0.2)',
-                        zeroline=False
-                    )
-                )
+                # Metriky plodiny z predpočítaných štatistík
+                stats = crop_stats[crop]
+                yield_trend = "↗️" if stats['count'] >= 2 and stats['last'] > stats['first'] else "↘️"
                 
                 # Pridanie metrík pod graf
                 st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
@@ -104,27 +244,29 @@ def create_crop_timeline_charts(df, parcel_name):
                 # Zobrazenie kľúčových metrík
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.metric("Priemerný výnos", f"{avg_yield:.2f} t/ha")
+                    st.metric("Priemerný výnos", f"{stats['mean']:.2f} t/ha")
                 with col2:
                     st.metric("Trend", yield_trend)
                 
                 # Detailné informácie o plodine
                 with st.expander(f"📊 Detailné údaje pre {crop}"):
-                    st.write(f"**Počet záznamov:** {len(crop_data_sorted)}")
-                    st.write(f"**Obdobie:** {crop_data_sorted['year'].min()} - {crop_data_sorted['year'].max()}")
-                    st.write(f"**Najlepší rok:** {crop_data_sorted.loc[crop_data_sorted['yield_ha'].idxmax(), 'year']} ({crop_data_sorted['yield_ha'].max():.2f} t/ha)")
-                    st.write(f"**Najhorší rok:** {crop_data_sorted.loc[crop_data_sorted['yield_ha'].idxmin(), 'year']} ({crop_data_sorted['yield_ha'].min():.2f} t/ha)")
+                    st.write(f"**Počet záznamov:** {stats['count']}")
+                    st.write(f"**Obdobie:** {stats['year_min']} - {stats['year_max']}")
+                    st.write(f"**Najlepší rok:** {stats['best_year']} ({stats['max']:.2f} t/ha)")
+                    st.write(f"**Najhorší rok:** {stats['worst_year']} ({stats['min']:.2f} t/ha)")
                     
                     # Malá tabuľka s údajmi
-                    display_data = crop_data_sorted[['year', 'yield_ha', 'yield_percentage']].copy()
-                    display_data.columns = ['Rok', 'Výnos (t/ha)', 'Výnosnosť (%)']
+                    display_data = crop_data_sorted[['year', 'yield_ha', 'yield_percentage']].set_axis(
+                        ['Rok', 'Výnos (t/ha)', 'Výnosnosť (%)'], axis=1
+                    )
                     st.dataframe(display_data, use_container_width=True, hide_index=True)
     
     return True
 
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_PARCEL)
 def create_parcel_yield_timeline(df, parcel_name):
     """Vytvorenie časovej osi výnosov pre konkrétnu parcelu"""
-    parcel_data = df[df['name'].astype(str) == parcel_name].copy()
+    parcel_data = get_parcel_data(df, parcel_name)
     
     if parcel_data.empty:
         return None
@@ -134,9 +276,8 @@ def create_parcel_yield_timeline(df, parcel_name):
     
     fig = go.Figure()
     
-    # Pre každú plodinu vytvoríme líniu
-    for crop in parcel_data['crop'].unique():
-        crop_data = parcel_data[parcel_data['crop'] == crop]
+    # Pre každú plodinu vytvoríme líniu (jeden prechod cez skupiny)
+    for crop, crop_data in parcel_data.groupby('crop', sort=False, observed=True):
         fig.add_trace(go.Scatter(
             x=crop_data['year'],
             y=crop_data['yield_ha'],
@@ -156,21 +297,21 @@ def create_parcel_yield_timeline(df, parcel_name):
     
     return fig
 
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=MAX_ENTRIES_PARCEL)
 def create_parcel_crop_comparison(df, parcel_name):
     """Porovnanie plodín na konkrétnej parcieli"""
-    parcel_data = df[df['name'].astype(str) == parcel_name].copy()
+    parcel_data = get_parcel_data(df, parcel_name)
     
     if parcel_data.empty:
         return None
     
-    # Agregácia dát podľa plodiny
-    crop_stats = parcel_data.groupby('crop').agg({
-        'yield_ha': ['mean', 'std', 'count'],
-        'area': 'mean'
-    }).round(2)
-    
-    crop_stats.columns = ['priemerny_vyos', 'std_vyos', 'pocet_rokov', 'priemerna_plocha']
-    crop_stats = crop_stats.reset_index()
+    # Agregácia dát podľa plodiny (pomenované stĺpce, plodina ako stĺpec)
+    crop_stats = parcel_data.groupby('crop', observed=True, as_index=False).agg(
+        priemerny_vyos=('yield_ha', 'mean'),
+        std_vyos=('yield_ha', 'std'),
+        pocet_rokov=('yield_ha', 'count'),
+        priemerna_plocha=('area', 'mean')
+    )
     
     # Vytvorenie grafu
     fig = go.Figure()
@@ -179,7 +320,8 @@ def create_parcel_crop_comparison(df, parcel_name):
         x=crop_stats['crop'],
         y=crop_stats['priemerny_vyos'],
         name='Priemerný výnos (t/ha)',
-        marker_color='#1f77b4'
+        marker_color='#1f77b4',
+        yhoverformat='.2f'
     ))
     
     fig.update_layout(
@@ -194,34 +336,34 @@ def create_parcel_crop_comparison(df, parcel_name):
 
 def create_parcel_performance_radar(df, parcel_name):
     """Radarový graf výkonnosti parcely"""
-    parcel_data = df[df['name'].astype(str) == parcel_name].copy()
+    parcel_data = get_parcel_data(df, parcel_name)
     
     if parcel_data.empty:
         return None
     
-    # Výpočet metrík
+    # Trend výnosov - priemerná medziročná zmena ročných priemerov
+    years = parcel_data['year'].to_numpy()
+    yields = parcel_data['yield_ha'].to_numpy(dtype=float)
+    order = np.argsort(years, kind='stable')
+    _, starts = np.unique(years[order], return_index=True)
+    yearly_means = np.add.reduceat(yields[order], starts) / np.diff(np.append(starts, len(yields)))
+    yield_trend = np.mean(np.diff(yearly_means) / yearly_means[:-1]) * 100 if len(yearly_means) > 1 else np.nan
+
+    # Metriky zo spoločného súhrnu parcely
+    summary = get_parcel_metrics(df, parcel_name)
     metrics = {
-        'Priemerná výnosnosť (%)': parcel_data['yield_percentage'].mean(),
-        'Stabilita výnosov': 100 - parcel_data['yield_ha'].std() / parcel_data['yield_ha'].mean() * 100,
-        'Počet plodín': parcel_data['crop'].nunique(),
-        'Priemerná plocha': parcel_data['area'].mean(),
-        'Trend výnosov': parcel_data.groupby('year')['yield_ha'].mean().pct_change().mean() * 100
+        'Priemerná výnosnosť (%)': summary['avg_performance'],
+        'Stabilita výnosov': 100 - summary['yield_cv'],
+        'Počet plodín': summary['crop_count'],
+        'Priemerná plocha': summary['area_mean'],
+        'Trend výnosov': yield_trend
     }
     
-    # Normalizácia hodnôt na 0-100
-    max_values = {
-        'Priemerná výnosnosť (%)': 150,
-        'Stabilita výnosov': 100,
-        'Počet plodín': 10,
-        'Priemerná plocha': 20,
-        'Trend výnosov': 20
-    }
-    
-    normalized_values = []
-    for metric, value in metrics.items():
-        normalized = min(100, max(0, (value / max_values[metric]) * 100))
-        normalized_values.append(normalized)
-    
+    # Normalizácia hodnôt na 0-100 (chýbajúce hodnoty ako 0)
+    values = np.array(list(metrics.values()), dtype=float)
+    max_values = np.array([150, 100, 10, 20, 20], dtype=float)
+    normalized_values = np.clip(np.nan_to_num(values / max_values * 100), 0, 100).tolist()
+
     fig = go.Figure()
     
     fig.add_trace(go.Scatterpolar(
@@ -250,7 +392,7 @@ def create_parcel_map(df, selected_parcel):
         from folium import plugins
         
         # Filtrovanie dát pre vybranú parcelu
-        parcel_data = df[df['name'].astype(str) == selected_parcel].copy()
+        parcel_data = get_parcel_data(df, selected_parcel)
         
         if parcel_data.empty or parcel_data['geometry'].isna().all():
             return None
@@ -260,17 +402,13 @@ def create_parcel_map(df, selected_parcel):
         if pd.isna(geometry_str):
             return None
         
-        # Konverzia na GeoDataFrame
-        parcel_geometry = wkt.loads(geometry_str)
-        gdf = gpd.GeoDataFrame([{'name': selected_parcel, 'geometry': parcel_geometry}])
-        gdf.set_crs(epsg=4326, inplace=True)
-        
-        # Výpočet bounds pre správny zoom
-        bounds = gdf.total_bounds  # [minx, miny, maxx, maxy]
+        # GeoJSON parcely a bounds pre správny zoom (cachované)
+        parcel_geojson, bounds = _parcel_geojson(selected_parcel, geometry_str)  # bounds: [minx, miny, maxx, maxy]
         center_lon = (bounds[0] + bounds[2]) / 2
         center_lat = (bounds[1] + bounds[3]) / 2
         
         # Výpočet vhodného zoom levelu na základe veľkosti parcely
+        max_range = max(bounds[2] - bounds[0], bounds[3] - bounds[1])
         if max_range > 0.1:  # Veľká parcela
             zoom_level = 11  # Znížené z 12 na 11 pre lepší prehľad
         elif max_range > 0.01:  # Stredná parcela
@@ -295,25 +433,13 @@ def create_parcel_map(df, selected_parcel):
         
         # Pridanie parcely s farebným kódovaním podľa výnosov
         if not parcel_data.empty:
-            # Výpočet priemerného výnosu pre farebné kódovanie
-            avg_yield = parcel_data['yield_ha'].mean()
-            avg_percentage = parcel_data['yield_percentage'].mean()
-            
-            # Farebné kódovanie podľa výnosnosti
-            if avg_percentage >= 120:
-                parcel_color = '#2E8B57'  # Tmavozelená - výborná
-            elif avg_percentage >= 100:
-                parcel_color = '#32CD32'  # Limetkovozelená - dobrá
-            elif avg_percentage >= 80:
-                parcel_color = '#FFD700'  # Zlatá - priemerná
-            elif avg_percentage >= 60:
-                parcel_color = '#FF8C00'  # Tmavooranžová - podpriemerná
-            else:
-                parcel_color = '#DC143C'  # Karmínová - slabá
+            # Farebné kódovanie podľa výnosnosti (spoločná tabuľka tried výkonnosti)
+            metrics = get_parcel_metrics(df, selected_parcel)
+            parcel_color = get_performance_grade(metrics['avg_performance'])[0]
             
             # Pridanie parcely ako polygon
             folium.GeoJson(
-                gdf,
+                parcel_geojson,
                 style_function=lambda x: {
                     'fillColor': parcel_color,
                     'color': '#000000',
@@ -326,28 +452,12 @@ def create_parcel_map(df, selected_parcel):
                     localize=True,
                     sticky=False,
                     labels=True,
-                    style="""
-                        background-color: rgba(0, 0, 0, 0.8);
-                        border: 2px solid white;
-                        border-radius: 5px;
-                        box-shadow: 3px;
-                        color: white;
-                        font-weight: bold;
-                        font-size: 12px;
-                        padding: 5px;
-                    """
+                    style=TOOLTIP_STYLE
                 )
             ).add_to(m)
         
         # Pridanie informačného boxu
         if not parcel_data.empty:
-            # Výpočet metrík pre informačný box
-            total_area = parcel_data['area'].sum()
-            avg_yield = parcel_data['yield_ha'].mean()
-            avg_percentage = parcel_data['yield_percentage'].mean()
-            crop_count = parcel_data['crop'].nunique()
-            year_range = f"{parcel_data['year'].min()} - {parcel_data['year'].max()}"
-            
             # Pridanie informačného boxu
             info_html = f"""
             <div style="position: fixed; 
@@ -355,11 +465,11 @@ def create_parcel_map(df, selected_parcel):
                         background-color: white; border:2px solid grey; z-index:9999; 
                         font-size:14px; padding: 10px; border-radius: 5px;">
                 <h4>Parcela: {selected_parcel}</h4>
-                <p><b>Plocha:</b> {total_area:.2f} ha</p>
-                <p><b>Priemerný výnos:</b> {avg_yield:.2f} t/ha</p>
-                <p><b>Výnosnosť:</b> {avg_percentage:.1f}%</p>
-                <p><b>Počet plodín:</b> {crop_count}</p>
-                <p><b>Obdobie:</b> {year_range}</p>
+                <p><b>Plocha:</b> {metrics['area_sum']:.2f} ha</p>
+                <p><b>Priemerný výnos:</b> {metrics['yield_mean']:.2f} t/ha</p>
+                <p><b>Výnosnosť:</b> {metrics['avg_performance']:.1f}%</p>
+                <p><b>Počet plodín:</b> {metrics['crop_count']}</p>
+                <p><b>Obdobie:</b> {metrics['labels']['period']}</p>
             </div>
             """
             m.get_root().html.add_child(folium.Element(info_html))
@@ -376,8 +486,11 @@ def create_parcel_map(df, selected_parcel):
 def create_enhanced_parcel_map(df, selected_parcel):
     """Vytvorenie datovej a faktografickej mapy parcely s mriežkou a bez satelitného pozadia"""
     try:
+        import folium
+        from folium import plugins
+        
         # Filtrovanie dát pre vybranú parcelu
-        parcel_data = df[df['name'].astype(str) == selected_parcel].copy()
+        parcel_data = get_parcel_data(df, selected_parcel)
         
         if parcel_data.empty or parcel_data['geometry'].isna().all():
             return None
@@ -387,13 +500,8 @@ def create_enhanced_parcel_map(df, selected_parcel):
         if pd.isna(geometry_str):
             return None
         
-        # Konverzia na GeoDataFrame
-        parcel_geometry = wkt.loads(geometry_str)
-        gdf = gpd.GeoDataFrame([{'name': selected_parcel, 'geometry': parcel_geometry}])
-        gdf.set_crs(epsg=4326, inplace=True)
-        
-        # Výpočet bounds pre správny zoom
-        bounds = gdf.total_bounds
+        # GeoJSON parcely a bounds pre správny zoom (cachované)
+        parcel_geojson, bounds = _parcel_geojson(selected_parcel, geometry_str)
         center_lon = (bounds[0] + bounds[2]) / 2
         center_lat = (bounds[1] + bounds[3]) / 2
         
@@ -410,12 +518,19 @@ def create_enhanced_parcel_map(df, selected_parcel):
         else:  # Malá parcela
             zoom_level = 17  # Znížené z 18 na 17 pre lepší prehľad
         
+        # Metriky pre farebné kódovanie a informácie (spoločný súhrn parcely)
+        metrics = get_parcel_metrics(df, selected_parcel)
+        
+        # Pokročilé farebné kódovanie podľa výnosnosti
+        parcel_color, performance_level, performance_score = get_performance_grade(metrics['avg_performance'])
+        
         # Vytvorenie mapy pomocou folium s datovým vzhľadom
         m = folium.Map(
             location=[center_lat, center_lon],
             zoom_start=zoom_level,
             tiles='CartoDB positron',  # Čistý, datový štýl bez satelitného pozadia
-            control_scale=True
+            control_scale=True,
+            prefer_canvas=True  # Vektorové vrstvy (mriežka, body) kreslené na jeden canvas namiesto SVG uzlov
         )
         
         # Nastavenie bounds s paddingom pre zobrazenie celej parcely
@@ -427,85 +542,9 @@ def create_enhanced_parcel_map(df, selected_parcel):
         
         # Pridanie parcely s farebným kódovaním
         folium.GeoJson(
-            gdf,
-            style_function=lambda x: {
-                'fillColor': parcel_color if 'parcel_color' in locals() else '#1f77b4',
-                'color': '#000000',
-                'weight': 3,
-                'fillOpacity': 0.8
-            },
-            tooltip=folium.GeoJsonTooltip(
-                fields=['name'],
-                aliases=['Parcela:'],
-                localize=True,
-                sticky=False,
-                labels=True,
-                style="""
-                    background-color: rgba(0, 0, 0, 0.8);
-                    border: 2px solid white;
-                    border-radius: 5px;
-                    box-shadow: 3px;
-                    color: white;
-                    font-weight: bold;
-                    font-size: 12px;
-                    padding: 5px;
-                """
-            )
-        ).add_to(m)
-        
-        # Výpočet metrík pre farebné kódovanie a informácie
-        if not parcel_data.empty:
-            avg_percentage = parcel_data['yield_percentage'].mean()
-            avg_yield = parcel_data['yield_ha'].mean()
-            total_area = parcel_data['area'].sum()
-            crop_count = parcel_data['crop'].nunique()
-            year_range = f"{parcel_data['year'].min()} - {parcel_data['year'].max()}"
-            
-            # Výpočet ďalších metrík
-            yield_std = parcel_data['yield_ha'].std()
-            yield_cv = (yield_std / avg_yield * 100) if avg_yield > 0 else 0
-            best_year = parcel_data.loc[parcel_data['yield_ha'].idxmax()]
-            worst_year = parcel_data.loc[parcel_data['yield_ha'].idxmin()]
-            
-            # Pokročilé farebné kódovanie podľa výnosnosti
-            if avg_percentage >= 130:
-                parcel_color = '#006400'  # Tmavozelená - výborná
-                performance_level = "Výborná"
-                performance_score = "A+"
-            elif avg_percentage >= 115:
-                parcel_color = '#228B22'  # Forest green - veľmi dobrá
-                performance_level = "Veľmi dobrá"
-                performance_score = "A"
-            elif avg_percentage >= 100:
-                parcel_color = '#32CD32'  # Limetkovozelená - dobrá
-                performance_level = "Dobrá"
-                performance_score = "B+"
-            elif avg_percentage >= 85:
-                parcel_color = '#FFD700'  # Zlatá - priemerná
-                performance_level = "Priemerná"
-                performance_score = "B"
-            elif avg_percentage >= 70:
-                parcel_color = '#FF8C00'  # Tmavooranžová - podpriemerná
-                performance_level = "Podpriemerná"
-                performance_score = "C"
-            else:
-                parcel_color = '#DC143C'  # Karmínová - slabá
-                performance_level = "Slabá"
-                performance_score = "D"
-        
-        # Vytvorenie mapy pomocou folium s datovým vzhľadom
-        m = folium.Map(
-            location=[center_lat, center_lon],
-            zoom_start=zoom_level,
-            tiles='CartoDB positron',  # Čistý, datový štýl bez satelitného pozadia
-            control_scale=True
-        )
-        
-        # Pridanie parcely s farebným kódovaním
-        folium.GeoJson(
-            gdf,
+            parcel_geojson,
             style_function=lambda x: {
-                'fillColor': parcel_color if 'parcel_color' in locals() else '#1f77b4',
+                'fillColor': parcel_color,
                 'color': '#000000',
                 'weight': 3,
                 'fillOpacity': 0.8
@@ -516,16 +555,7 @@ def create_enhanced_parcel_map(df, selected_parcel):
                 localize=True,
                 sticky=False,
                 labels=True,
-                style="""
-                    background-color: rgba(0, 0, 0, 0.8);
-                    border: 2px solid white;
-                    border-radius: 5px;
-                    box-shadow: 3px;
-                    color: white;
-                    font-weight: bold;
-                    font-size: 12px;
-                    padding: 5px;
-                """
+                style=TOOLTIP_STYLE
             )
         ).add_to(m)
         
@@ -533,57 +563,56 @@ def create_enhanced_parcel_map(df, selected_parcel):
         # Vytvorenie mriežky okolo parcely
         grid_spacing = max_range / 10  # 10 riadkov/stĺpcov mriežky
         
-        # Pridanie vertikálnych čiar mriežky
-        for i in range(11):
-            lon_pos = bounds[0] + i * grid_spacing
-            folium.PolyLine(
-                locations=[[bounds[1], lon_pos], [bounds[3], lon_pos]],
-                color='rgba(128, 128, 128, 0.3)',
-                weight=1,
-                opacity=0.3
-            ).add_to(m)
-        
-        # Pridanie horizontálnych čiar mriežky
-        for i in range(11):
-            lat_pos = bounds[1] + i * grid_spacing
-            folium.PolyLine(
-                locations=[[lat_pos, bounds[0]], [lat_pos, bounds[2]]],
-                color='rgba(128, 128, 128, 0.3)',
-                weight=1,
-                opacity=0.3
-            ).add_to(m)
+        # Vertikálne a horizontálne čiary mriežky ako jedna viacsegmentová línia
+        lon_pos = bounds[0] + np.arange(11) * grid_spacing
+        lat_pos = bounds[1] + np.arange(11) * grid_spacing
+        vertical_lines = np.stack([
+            np.column_stack([np.full(11, bounds[1]), lon_pos]),
+            np.column_stack([np.full(11, bounds[3]), lon_pos])
+        ], axis=1)
+        horizontal_lines = np.stack([
+            np.column_stack([lat_pos, np.full(11, bounds[0])]),
+            np.column_stack([lat_pos, np.full(11, bounds[2])])
+        ], axis=1)
+        grid_lines = np.concatenate([vertical_lines, horizontal_lines]).tolist()
+        
+        folium.PolyLine(
+            locations=grid_lines,
+            color='rgba(128, 128, 128, 0.3)',
+            weight=1,
+            opacity=0.3
+        ).add_to(m)
         
-        # Pridanie súradníc mriežky
-        for i in range(11):
-            for j in range(11):
-                lon_pos = bounds[0] + i * grid_spacing
-                lat_pos = bounds[1] + j * grid_spacing
-                folium.CircleMarker(
-                    location=[lat_pos, lon_pos],
-                    radius=2,
-                    color='rgba(128, 128, 128, 0.5)',
-                    fill=True,
-                    fillColor='rgba(128, 128, 128, 0.5)',
-                    fillOpacity=0.5
-                ).add_to(m)
+        # Pridanie súradníc mriežky ako jedna vrstva bodov
+        grid_lon, grid_lat = np.meshgrid(lon_pos, lat_pos, indexing='ij')
+        grid_points = np.column_stack([grid_lon.ravel(), grid_lat.ravel()]).tolist()
+        folium.GeoJson(
+            {'type': 'MultiPoint', 'coordinates': grid_points},
+            marker=folium.CircleMarker(
+                radius=2,
+                color='rgba(128, 128, 128, 0.5)',
+                fill=True,
+                fillColor='rgba(128, 128, 128, 0.5)',
+                fillOpacity=0.5
+            )
+        ).add_to(m)
         
         # Pridanie hlavného informačného boxu s datami
         if not parcel_data.empty:
             info_html = f"""
             <div style="position: fixed; 
                         top: 10px; left: 10px; width: 350px; height: auto; 
-                        background-color: white; border:2px solid {parcel_color if 'parcel_color' in locals() else '#1f77b4'}; z-index:9999; 
+                        background-color: white; border:2px solid {parcel_color}; z-index:9999; 
                         font-size:14px; padding: 15px; border-radius: 5px; box-shadow: 3px 3px 10px rgba(0,0,0,0.3);">
                 <h4>🏞️ {selected_parcel}</h4>
                 <p><b>Výkonnosť:</b> {performance_level} ({performance_score})</p>
-                <p><b>Výnosnosť:</b> {avg_percentage:.1f}%</p>
-                <p><b>Priemerný výnos:</b> {avg_yield:.2f} t/ha</p>
-                <p><b>Celková plocha:</b> {total_area:.2f} ha</p>
-                <p><b>Počet plodín:</b> {crop_count}</p>
-                <p><b>Obdobie:</b> {year_range}</p>
+                <p><b>Výnosnosť:</b> {metrics['avg_performance']:.1f}%</p>
+                <p><b>Priemerný výnos:</b> {metrics['yield_mean']:.2f} t/ha</p>
+                <p><b>Celková plocha:</b> {metrics['area_sum']:.2f} ha</p>
+                <p><b>Počet plodín:</b> {metrics['crop_count']}</p>
+                <p><b>Obdobie:</b> {metrics['labels']['period']}</p>
             </div>
             """
-            m.get_root().html.add_child(folium.Element(info_html))
             
             # Pridanie štatistického boxu s detailnými metrikami
             stats_html = f"""
@@ -592,31 +621,24 @@ def create_enhanced_parcel_map(df, selected_parcel):
                         background-color: white; border:2px solid rgba(0,0,0,0.5); z-index:9999; 
                         font-size:12px; padding: 15px; border-radius: 5px; box-shadow: 3px 3px 10px rgba(0,0,0,0.3);">
                 <h4>📊 Štatistiky parcely:</h4>
-                <p><b>Variabilita (CV):</b> {yield_cv:.1f}%</p>
-                <p><b>Najlepší rok:</b> {best_year['year']} ({best_year['crop']})</p>
-                <p><b>Najhorší rok:</b> {worst_year['year']} ({worst_year['crop']})</p>
-                <p><b>Rozsah výnosov:</b> {worst_year['yield_ha']:.2f} - {best_year['yield_ha']:.2f} t/ha</p>
-                <p><b>Počet záznamov:</b> {len(parcel_data)}</p>
+                <p><b>Variabilita (CV):</b> {metrics['labels']['yield_cv']}</p>
+                <p><b>Najlepší rok:</b> {metrics['labels']['best_year']}</p>
+                <p><b>Najhorší rok:</b> {metrics['labels']['worst_year']}</p>
+                <p><b>Rozsah výnosov:</b> {metrics['worst_yield']:.2f} - {metrics['best_yield']:.2f} t/ha</p>
+                <p><b>Počet záznamov:</b> {metrics['count']}</p>
             </div>
             """
-            m.get_root().html.add_child(folium.Element(stats_html))
             
             # Pridanie legendy pre farebné kódovanie
-            legend_html = """
+            legend_html = f"""
             <div style="position: fixed; 
                         bottom: 10px; left: 10px; width: 300px; height: auto; 
                         background-color: white; border:2px solid rgba(0,0,0,0.3); z-index:9999; 
                         font-size:11px; padding: 15px; border-radius: 5px; box-shadow: 3px 3px 10px rgba(0,0,0,0.3);">
                 <h4>🎨 Farebné kódovanie výnosnosti:</h4>
-                <p>🟢 ≥130% - Výborná (A+)</p>
-                <p>🟢 ≥115% - Veľmi dobrá (A)</p>
-                <p>🟢 ≥100% - Dobrá (B+)</p>
-                <p>🟡 ≥85% - Priemerná (B)</p>
-                <p>🟠 ≥70% - Podpriemerná (C)</p>
-                <p>🔴 <70% - Slabá (D)</p>
+                {PERFORMANCE_LEGEND_ROWS}
             </div>
             """
-            m.get_root().html.add_child(folium.Element(legend_html))
             
             # Pridanie súradníc parcely
             coords_html = f"""
@@ -630,7 +652,9 @@ def create_enhanced_parcel_map(df, selected_parcel):
                 <p>Zoom: {zoom_level}</p>
             </div>
             """
-            m.get_root().html.add_child(folium.Element(coords_html))
+            
+            # Všetky informačné boxy ako jeden HTML element
+            m.get_root().html.add_child(folium.Element(info_html + stats_html + legend_html + coords_html))
         
         # Pridanie fullscreen tlačidla
         plugins.Fullscreen().add_to(m)
@@ -641,157 +665,95 @@ def create_enhanced_parcel_map(df, selected_parcel):
         st.error(f"Chyba pri vytváraní datovej mapy parcely: {e}")
         return None
 
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=1)
+def get_parcel_geometry_stats(df):
+    """Metriky a WKT geometria parciel s geometriou - maska a groupby raz pre dataset"""
+    parcels_with_geometry = df.loc[df['geometry'].notna()]
+    grouped = parcels_with_geometry.groupby('name', observed=True)
+    
+    # Agregácia dát podľa parciel s detailnými metrikami
+    parcel_stats = grouped.agg({
+        'yield_percentage': ['mean', 'std', 'min', 'max'],
+        'yield_ha': ['mean', 'std', 'min', 'max'],
+        'area': ['sum', 'mean'],
+        'crop': 'nunique',
+        'year': ['min', 'max', 'nunique']
+    })
+    
+    # Flatten column names
+    parcel_stats.columns = [
+        'avg_yield_percentage', 'std_yield_percentage', 'min_yield_percentage', 'max_yield_percentage',
+        'avg_yield_ha', 'std_yield_ha', 'min_yield_ha', 'max_yield_ha',
+        'total_area', 'avg_area', 'crop_count', 'year_min', 'year_max', 'year_count'
+    ]
+    
+    # Jedna geometria na parcelu (rovnaké poradie ako metriky)
+    parcel_stats['geometry'] = grouped['geometry'].first()
+    return parcel_stats.reset_index()
+
 def create_all_parcels_map(df):
-    """Vytvorenie datovej a faktografickej mapy všetkých parciel s mriežkou a bez satelitného pozadia"""
+    """Vytvorenie datovej a faktografickej mapy všetkých parciel s mriežkou a bez satelitného pozadia (momentálne ju nevolá žiadna stránka)"""
     try:
-        # Filtrovanie dát s geometriou
-        parcels_with_geometry = df[df['geometry'].notna()].copy()
-        
-        if parcels_with_geometry.empty:
-            return None
-        
-        # Agregácia dát podľa parciel s detailnými metrikami
-        parcel_stats = parcels_with_geometry.groupby('name').agg({
-            'yield_percentage': ['mean', 'std', 'min', 'max'],
-            'yield_ha': ['mean', 'std', 'min', 'max'],
-            'area': ['sum', 'mean'],
-            'crop': 'nunique',
-            'year': ['min', 'max', 'nunique']
-        }).round(2)
-        
-        # Flatten column names
-        parcel_stats.columns = [
-            'avg_yield_percentage', 'std_yield_percentage', 'min_yield_percentage', 'max_yield_percentage',
-            'avg_yield_ha', 'std_yield_ha', 'min_yield_ha', 'max_yield_ha',
-            'total_area', 'avg_area', 'crop_count', 'year_min', 'year_max', 'year_count'
-        ]
-        parcel_stats = parcel_stats.reset_index()
+        import geopandas as gpd
+        import shapely
+        import folium
+        from folium import plugins
         
-        # Výpočet celkových bounds
-        all_geometries = []
-        for _, row in parcels_with_geometry.iterrows():
-            try:
-                geom = wkt.loads(row['geometry'])
-                all_geometries.append(geom)
-            except:
-                continue
+        # Agregované metriky parciel s geometriou (cachované pre dataset)
+        parcel_stats = get_parcel_geometry_stats(df)
         
-        if not all_geometries:
+        if parcel_stats.empty:
             return None
         
-        # Vytvorenie GeoDataFrame pre všetky parcely
-        gdf = gpd.GeoDataFrame(parcel_stats)
-        gdf['geometry'] = all_geometries[:len(parcel_stats)]
-        gdf.set_crs(epsg=4326, inplace=True)
+        # Hromadné parsovanie WKT - jedna geometria na parcelu
+        geometries = shapely.from_wkt(parcel_stats.pop('geometry').to_numpy(), on_invalid='ignore')
+
+        # Vytvorenie GeoDataFrame pre všetky parcely (bez neplatných geometrií)
+        gdf = gpd.GeoDataFrame(parcel_stats, geometry=geometries, crs='EPSG:4326')
+        gdf = gdf[gdf.geometry.notna()].reset_index(drop=True)
+
+        if gdf.empty:
+            return None
         
-        # Výpočet bounds
-        bounds = gdf.total_bounds
+        # Výpočet bounds priamo nad poľom geometrií
+        bounds = shapely.total_bounds(geometries)
         center_lon = (bounds[0] + bounds[2]) / 2
         center_lat = (bounds[1] + bounds[3]) / 2
         
-        # Vytvorenie mapy pomocou folium s datovým vzhľadom
-        m = folium.Map(
-            location=[center_lat, center_lon],
-            zoom_start=10,
-            tiles='CartoDB positron',  # Čistý, datový štýl bez satelitného pozadia
-            control_scale=True
-        )
+        # Zjednodušenie geometrií pre menší GeoJSON
+        gdf['geometry'] = simplify_geometries(gdf.geometry.values, max(bounds[2] - bounds[0], bounds[3] - bounds[1]))
         
-        # Pridanie všetkých parciel s farebným kódovaním
-        for idx, row in gdf.iterrows():
-            # Farebné kódovanie podľa výnosnosti
-            if row['avg_yield_percentage'] >= 130:
-                color = '#006400'  # Tmavozelená
-            elif row['avg_yield_percentage'] >= 115:
-                color = '#228B22'  # Forest green
-            elif row['avg_yield_percentage'] >= 100:
-                color = '#32CD32'  # Limetkovozelená
-            elif row['avg_yield_percentage'] >= 85:
-                color = '#FFD700'  # Zlatá
-            elif row['avg_yield_percentage'] >= 70:
-                color = '#FF8C00'  # Tmavooranžová
-            else:
-                color = '#DC143C'  # Karmínová
-            
-            # Pridanie parcely
-            folium.GeoJson(
-                gdf.iloc[[idx]],
-                style_function=lambda x: {
-                    'fillColor': color,
-                    'color': '#000000',
-                    'weight': 1,
-                    'fillOpacity': 0.7
-                },
-                tooltip=folium.GeoJsonTooltip(
-                    fields=['name', 'avg_yield_percentage', 'total_area'],
-                    aliases=['Parcela:', 'Výnosnosť (%):', 'Plocha (ha):'],
-                    localize=True,
-                    sticky=False,
-                    labels=True,
-                    style="""
-                        background-color: rgba(0, 0, 0, 0.8);
-                        border: 2px solid white;
-                        border-radius: 5px;
-                        box-shadow: 3px;
-                        color: white;
-                        font-weight: bold;
-                        font-size: 12px;
-                        padding: 5px;
-                    """
-                )
-            ).add_to(m)
+        # Farebné kódovanie podľa výnosnosti (vektorovo pre všetky parcely)
+        gdf['color'] = get_performance_colors(gdf['avg_yield_percentage'])
         
         # Vytvorenie mapy pomocou folium s datovým vzhľadom
         m = folium.Map(
             location=[center_lat, center_lon],
             zoom_start=10,
             tiles='CartoDB positron',  # Čistý, datový štýl bez satelitného pozadia
-            control_scale=True
+            control_scale=True,
+            prefer_canvas=True  # Vektorové vrstvy (mriežka, body) kreslené na jeden canvas namiesto SVG uzlov
         )
         
-        # Pridanie všetkých parciel s farebným kódovaním
-        for idx, row in gdf.iterrows():
-            # Farebné kódovanie podľa výnosnosti
-            if row['avg_yield_percentage'] >= 130:
-                color = '#006400'  # Tmavozelená
-            elif row['avg_yield_percentage'] >= 115:
-                color = '#228B22'  # Forest green
-            elif row['avg_yield_percentage'] >= 100:
-                color = '#32CD32'  # Limetkovozelená
-            elif row['avg_yield_percentage'] >= 85:
-                color = '#FFD700'  # Zlatá
-            elif row['avg_yield_percentage'] >= 70:
-                color = '#FF8C00'  # Tmavooranžová
-            else:
-                color = '#DC143C'  # Karmínová
-            
-            # Pridanie parcely
-            folium.GeoJson(
-                gdf.iloc[[idx]],
-                style_function=lambda x: {
-                    'fillColor': color,
-                    'color': '#000000',
-                    'weight': 1,
-                    'fillOpacity': 0.7
-                },
-                tooltip=folium.GeoJsonTooltip(
-                    fields=['name', 'avg_yield_percentage', 'total_area'],
-                    aliases=['Parcela:', 'Výnosnosť (%):', 'Plocha (ha):'],
-                    localize=True,
-                    sticky=False,
-                    labels=True,
-                    style="""
-                        background-color: rgba(0, 0, 0, 0.8);
-                        border: 2px solid white;
-                        border-radius: 5px;
-                        box-shadow: 3px;
-                        color: white;
-                        font-weight: bold;
-                        font-size: 12px;
-                        padding: 5px;
-                    """
-                )
-            ).add_to(m)
+        # Pridanie všetkých parciel jednou vrstvou - farba sa číta z vlastností parcely
+        # (zaokrúhľujú sa len hodnoty zobrazené v tooltipe)
+        folium.GeoJson(
+            gdf.round({'avg_yield_percentage': 2, 'total_area': 2}),
+            style_function=lambda x: {
+                'fillColor': x['properties']['color'],
+                'color': '#000000',
+                'weight': 1,
+                'fillOpacity': 0.7
+            },
+            tooltip=folium.GeoJsonTooltip(
+                fields=['name', 'avg_yield_percentage', 'total_area'],
+                aliases=['Parcela:', 'Výnosnosť (%):', 'Plocha (ha):'],
+                localize=True,
+                sticky=False,
+                labels=True,
+                style=TOOLTIP_STYLE
+            )
+        ).add_to(m)
         
         # Pridanie mriežky pre datový vzhľad
         # Výpočet rozmerov oblasti
@@ -799,62 +761,57 @@ def create_all_parcels_map(df):
         lat_range = bounds[3] - bounds[1]
         grid_spacing = max(lon_range, lat_range) / 20  # 20 riadkov/stĺpcov mriežky
         
-        # Pridanie vertikálnych čiar mriežky
-        for i in range(21):
-            lon_pos = bounds[0] + i * grid_spacing
-            folium.PolyLine(
-                locations=[[bounds[1], lon_pos], [bounds[3], lon_pos]],
-                color='rgba(128, 128, 128, 0.2)',
-                weight=0.5,
-                opacity=0.2
-            ).add_to(m)
-        
-        # Pridanie horizontálnych čiar mriežky
-        for i in range(21):
-            lat_pos = bounds[1] + i * grid_spacing
-            folium.PolyLine(
-                locations=[[lat_pos, bounds[0]], [lat_pos, bounds[2]]],
-                color='rgba(128, 128, 128, 0.2)',
-                weight=0.5,
-                opacity=0.2
-            ).add_to(m)
+        # Vertikálne a horizontálne čiary mriežky ako jedna viacsegmentová línia
+        lon_pos = bounds[0] + np.arange(21) * grid_spacing
+        lat_pos = bounds[1] + np.arange(21) * grid_spacing
+        vertical_lines = np.stack([
+            np.column_stack([np.full(21, bounds[1]), lon_pos]),
+            np.column_stack([np.full(21, bounds[3]), lon_pos])
+        ], axis=1)
+        horizontal_lines = np.stack([
+            np.column_stack([lat_pos, np.full(21, bounds[0])]),
+            np.column_stack([lat_pos, np.full(21, bounds[2])])
+        ], axis=1)
+        grid_lines = np.concatenate([vertical_lines, horizontal_lines]).tolist()
+        
+        folium.PolyLine(
+            locations=grid_lines,
+            color='rgba(128, 128, 128, 0.2)',
+            weight=0.5,
+            opacity=0.2
+        ).add_to(m)
         
-        # Pridanie súradníc mriežky (menej husté pre prehľadnosť)
-        for i in range(0, 21, 2):  # Každý druhý bod
-            for j in range(0, 21, 2):
-                lon_pos = bounds[0] + i * grid_spacing
-                lat_pos = bounds[1] + j * grid_spacing
-                folium.CircleMarker(
-                    location=[lat_pos, lon_pos],
-                    radius=1,
-                    color='rgba(128, 128, 128, 0.3)',
-                    fill=True,
-                    fillColor='rgba(128, 128, 128, 0.3)',
-                    fillOpacity=0.3
-                ).add_to(m)
+        # Pridanie súradníc mriežky ako jedna vrstva bodov (každý druhý bod)
+        grid_lon, grid_lat = np.meshgrid(lon_pos[::2], lat_pos[::2], indexing='ij')
+        grid_points = np.column_stack([grid_lon.ravel(), grid_lat.ravel()]).tolist()
+        folium.GeoJson(
+            {'type': 'MultiPoint', 'coordinates': grid_points},
+            marker=folium.CircleMarker(
+                radius=1,
+                color='rgba(128, 128, 128, 0.3)',
+                fill=True,
+                fillColor='rgba(128, 128, 128, 0.3)',
+                fillOpacity=0.3
+            )
+        ).add_to(m)
         
         # Pridanie hlavnej legendy s farebným kódovaním
-        legend_html = """
+        legend_html = f"""
         <div style="position: fixed; 
                     top: 10px; right: 10px; width: 300px; height: auto; 
                     background-color: white; border:2px solid rgba(0,0,0,0.5); z-index:9999; 
                     font-size:12px; padding: 15px; border-radius: 5px; box-shadow: 3px 3px 10px rgba(0,0,0,0.3);">
             <h4>🎨 Farebné kódovanie parciel:</h4>
-            <p>🟢 ≥130% - Výborná (A+)</p>
-            <p>🟢 ≥115% - Veľmi dobrá (A)</p>
-            <p>🟢 ≥100% - Dobrá (B+)</p>
-            <p>🟡 ≥85% - Priemerná (B)</p>
-            <p>🟠 ≥70% - Podpriemerná (C)</p>
-            <p>🔴 <70% - Slabá (D)</p>
+            {PERFORMANCE_LEGEND_ROWS}
         </div>
         """
-        m.get_root().html.add_child(folium.Element(legend_html))
         
         # Pridanie detailných štatistík všetkých parciel
         total_parcels = len(parcel_stats)
-        avg_performance = parcel_stats['avg_yield_percentage'].mean()
-        best_parcel = parcel_stats.loc[parcel_stats['avg_yield_percentage'].idxmax()]
-        worst_parcel = parcel_stats.loc[parcel_stats['avg_yield_percentage'].idxmin()]
+        performance = parcel_stats['avg_yield_percentage'].to_numpy()
+        avg_performance = np.nanmean(performance)
+        best_pos, worst_pos = np.nanargmax(performance), np.nanargmin(performance)
+        best_parcel, worst_parcel = parcel_stats['name'].iat[best_pos], parcel_stats['name'].iat[worst_pos]
         
         stats_html = f"""
         <div style="position: fixed; 
@@ -868,7 +825,6 @@ def create_all_parcels_map(df):
             <p>Celková plocha: {parcel_stats['total_area'].sum():.1f} ha</p>
         </div>
         """
-        m.get_root().html.add_child(folium.Element(stats_html))
         
         # Pridanie informácií o najlepšej a najhoršej parcieli
         best_worst_html = f"""
@@ -876,13 +832,12 @@ def create_all_parcels_map(df):
                     bottom: 10px; left: 10px; width: 350px; height: auto; 
                     background-color: white; border:2px solid rgba(0,0,0,0.3); z-index:9999; 
                     font-size:11px; padding: 15px; border-radius: 5px; box-shadow: 3px 3px 10px rgba(0,0,0,0.3);">
-                         <h4>📊 Najlepšia parcela: {best_parcel['name']}</h4>
-            <p>Výnosnosť: {best_parcel['avg_yield_percentage']:.1f}%</p>
-            <h4>⚠️ Najhoršia parcela: {worst_parcel['name']}</h4>
-            <p>Výnosnosť: {worst_parcel['avg_yield_percentage']:.1f}%</p>
+                         <h4>📊 Najlepšia parcela: {best_parcel}</h4>
+            <p>Výnosnosť: {performance[best_pos]:.1f}%</p>
+            <h4>⚠️ Najhoršia parcela: {worst_parcel}</h4>
+            <p>Výnosnosť: {performance[worst_pos]:.1f}%</p>
         </div>
         """
-        m.get_root().html.add_child(folium.Element(best_worst_html))
         
         # Pridanie súradníc oblasti
         coords_html = f"""
@@ -896,7 +851,9 @@ def create_all_parcels_map(df):
             <p>Zoom: 10</p>
         </div>
         """
-        m.get_root().html.add_child(folium.Element(coords_html))
+        
+        # Všetky informačné boxy ako jeden HTML element
+        m.get_root().html.add_child(folium.Element(legend_html + stats_html + best_worst_html + coords_html))
         
         # Pridanie fullscreen tlačidla
         plugins.Fullscreen().add_to(m)
@@ -907,6 +864,12 @@ def create_all_parcels_map(df):
         st.error(f"Chyba pri vytváraní datovej mapy všetkých parciel: {e}")
         return None
 
+@st.cache_data(show_spinner=False, hash_funcs=DATA_HASH_FUNCS, max_entries=2 * MAX_ENTRIES_PARCEL)
+def get_parcel_map_html(df, parcel_name, enhanced):
+    """HTML vybranej mapy parcely (cachované, prepínanie typu mapy nevytvára mapu znova)"""
+    map_fig = create_enhanced_parcel_map(df, parcel_name) if enhanced else create_parcel_map(df, parcel_name)
+    return map_fig._repr_html_() if map_fig else None
+
 def show_parcel_statistics(df, selected_parcel):
     """Zobrazenie štatistík na úrovni parcely"""
     st.header("🏞️ Štatistiky na úrovni parcely")
@@ -916,29 +879,32 @@ def show_parcel_statistics(df, selected_parcel):
         return
     
     # Filtrovanie dát pre vybranú parcelu
-    # Konverzia na string pre správne porovnanie
-    parcel_data = df[df['name'].astype(str) == selected_parcel].copy()
+    parcel_data = get_parcel_data(df, selected_parcel)
     
     if parcel_data.empty:
         st.error(f"Pre parcelu {selected_parcel} nie sú dostupné žiadne dáta.")
         return
     
+    # Súhrnné metriky parcely (jeden výpočet pre celú stránku)
+    metrics = get_parcel_metrics(df, selected_parcel)
+    labels = metrics['labels']
+    
     # Základné informácie o parcieli
     st.subheader(f"📋 Informácie o parcieli: {selected_parcel}")
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Počet záznamov", f"{len(parcel_data):,}")
+        st.metric("Počet záznamov", labels['count'])
     
     with col2:
-        st.metric("Počet plodín", f"{parcel_data['crop'].nunique()}")
+        st.metric("Počet plodín", labels['crop_count'])
     
     with col3:
-        st.metric("Obdobie", f"{parcel_data['year'].min()} - {parcel_data['year'].max()}")
+        st.metric("Obdobie", labels['period'])
     
     with col4:
-        st.metric("Priemerná plocha", f"{parcel_data['area'].mean():.2f} ha")
+        st.metric("Priemerná plocha", labels['area_mean'])
     
     # Porovnanie plodín
     st.subheader("🌾 Porovnanie plodín")
@@ -957,16 +923,14 @@ def show_parcel_statistics(df, selected_parcel):
     # Detailné dáta parcely
     st.subheader("📊 Detailné dáta parcely")
     
-    # Agregované dáta podľa roku a plodiny
-    parcel_summary = parcel_data.groupby(['year', 'crop']).agg({
-        'yield_ha': 'mean',
-        'yield_percentage': 'mean',
-        'area': 'mean'
-    }).round(2).reset_index()
-    
+    # Agregované dáta podľa roku a plodiny (cachované)
     st.dataframe(
-        parcel_summary.sort_values(['year', 'crop'], ascending=[False, True]),
-        use_container_width=True
+        get_parcel_summary(df, selected_parcel),
+        use_container_width=True,
+        column_config={
+            column: st.column_config.NumberColumn(format='%.2f')
+            for column in ('yield_ha', 'yield_percentage', 'area')
+        }
     )
     
     # Radarový graf výkonnosti
@@ -992,18 +956,14 @@ def show_parcel_statistics(df, selected_parcel):
         with col1:
             st.info(f"**Parcela:** {selected_parcel}")
         with col2:
-            st.info(f"**Výnosnosť:** {parcel_data['yield_percentage'].mean():.1f}%")
+            st.info(f"**Výnosnosť:** {labels['avg_performance']}")
     
     with st.spinner("Generujem datovú mapu parcely s mriežkou..."):
-        if map_type == "Datová mapa s mriežkou (odporúčané)":
-            map_fig = create_enhanced_parcel_map(df, selected_parcel)
-        else:
-            map_fig = create_parcel_map(df, selected_parcel)
+        map_html = get_parcel_map_html(df, selected_parcel, map_type == "Datová mapa s mriežkou (odporúčané)")
             
-        if map_fig:
+        if map_html:
             # Pre folium mapu používame st.components.html
-            folium_static = map_fig._repr_html_()
-            st.components.v1.html(folium_static, height=700)
+            st.components.v1.html(map_html, height=700)
             
             # Pridanie informácií o mape
             if map_type == "Základná mapa":
@@ -1018,21 +978,18 @@ def show_parcel_statistics(df, selected_parcel):
     
     with col1:
         # Variabilita výnosov
-        yield_variability = parcel_data['yield_ha'].std() / parcel_data['yield_ha'].mean() * 100
-        st.metric("Variabilita výnosov (CV)", f"{yield_variability:.1f}%")
+        st.metric("Variabilita výnosov (CV)", labels['yield_cv'])
         
         # Najlepší rok
-        best_year = parcel_data.loc[parcel_data['yield_ha'].idxmax()]
-        st.metric("Najlepší rok", f"{best_year['year']} ({best_year['crop']})")
+        st.metric("Najlepší rok", labels['best_year'])
     
     with col2:
         # Priemerná výnosnosť
-        avg_performance = parcel_data['yield_percentage'].mean()
-        st.metric("Priemerná výnosnosť", f"{avg_performance:.1f}%")
+        avg_performance = metrics['avg_performance']
+        st.metric("Priemerná výnosnosť", labels['avg_performance'])
         
         # Najhorší rok
-        worst_year = parcel_data.loc[parcel_data['yield_ha'].idxmin()]
-        st.metric("Najhorší rok", f"{worst_year['year']} ({worst_year['crop']})")
+        st.metric("Najhorší rok", labels['worst_year'])
     
     # Odporúčania pre parcelu
     st.subheader("💡 Odporúčania pre parcelu")
@@ -1054,10 +1011,9 @@ def show_parcel_statistics(df, selected_parcel):
     st.subheader("💾 Export dát parcely")
     
     if st.button("Export CSV pre parcelu"):
-        csv = parcel_data.to_csv(index=False, encoding='utf-8-sig')
         st.download_button(
             label="Stiahnuť CSV",
-            data=csv,
-            file_name=f"parcela_{selected_parcel.replace(' ', '_')}_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+            data=get_parcel_csv(df, selected_parcel),
+            file_name=f"parcela_{selected_parcel.replace(' ', '_')}_{date.today():%Y%m%d}.csv",
             mime="text/csv"
         )
@@ -1,11 +1,10 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 import warnings
 warnings.filterwarnings('ignore')
 
 # Import modulov
-from modules.data_loader import load_data, calculate_yield_percentage
+from modules.data_loader import load_data, get_available_parcels, get_available_crops
 from modules.enterprise_stats import show_enterprise_statistics
 from modules.parcel_stats import show_parcel_statistics
 from modules.crop_stats import show_crop_statistics
@@ -68,20 +67,16 @@ st.markdown("""
 def main():
     st.markdown('<h1 class="main-header">🌾 Analýza výnosov DPB</h1>', unsafe_allow_html=True)
     
-    # Načítanie dát
-    with st.spinner("Načítavam dáta z CSV súboru..."):
-        df = load_data()
+    # Načítanie dát (vrátane percentuálnych výnosov, cachované - spinner len pri prvom načítaní)
+    df = load_data()
     
     if df is None:
         st.error("Nepodarilo sa načítať dáta. Skontrolujte, či existuje súbor 'yield_data.csv'.")
         return
     
-    # Výpočet percentuálnych výnosov
-    df = calculate_yield_percentage(df)
-    
-    # Inicializácia session state pre plodinu
-    available_crops = sorted(df['crop'].unique())
-    if 'selected_crop' not in st.session_state:
+    # Inicializácia session state pre plodinu (aj keď uložená plodina po zmene dát už neexistuje)
+    available_crops = get_available_crops(df)
+    if st.session_state.get('selected_crop') not in available_crops:
         # Hľadanie indexu pre PŠENICE OZ.
         if "PŠENICE OZ." in available_crops:
             st.session_state.selected_crop = "PŠENICE OZ."
@@ -135,7 +130,7 @@ def main():
         st.subheader("🔍 Filtre")
         
         # Získanie zoznamu parciel
-        available_parcels = sorted([str(parcel) for parcel in df['name'].unique() if pd.notna(parcel)])
+        available_parcels = get_available_parcels(df)
         
         if not available_parcels:
             st.error("Nie sú dostupné žiadne parcely.")